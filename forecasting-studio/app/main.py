@@ -3,16 +3,22 @@
 This file wires routes and serves a tiny single-file frontend as well.
 It imports utility functions and strategies from the app package.
 """
-from fastapi import FastAPI, UploadFile, File, HTTPException
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi import FastAPI, UploadFile, File, HTTPException, BackgroundTasks
+from fastapi.responses import HTMLResponse, Response
 from pydantic import BaseModel, Field
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Literal
+import asyncio
+import logging
 import os
+import tempfile
+import orjson
 
 # Local imports from package
-from .utils import load_csv_from_path, load_csv_from_bytes, run_backtest, run_walkforward
+from .utils import load_csv_from_path, read_csv_head, run_backtest, run_walkforward
 from .strategies import register, SmaCross  # ensures registration of built-in strategies
 
+logger = logging.getLogger(__name__)
+
 app = FastAPI(title='Forecasting Studio - Structured')
 
 # Data dir (relative to project) - the utils functions will also reference this
@@ -20,6 +26,15 @@ BASE_DIR = os.path.dirname(os.path.dirname(__file__))
 DATA_DIR = os.path.join(BASE_DIR, '..', 'data')
 DATA_DIR = os.path.abspath(DATA_DIR)
 
+# Uploads are streamed to disk in blocks of this many bytes
+UPLOAD_BLOCKSIZE = 1 << 20
+# Only this many leading rows are parsed to validate an upload and build its preview
+UPLOAD_VALIDATE_ROWS = 100_000
+
+def _json_response(content: Dict[str, Any]) -> Response:
+    # orjson serializes the ndarray fields (equity, timestamps) without per-element boxing
+    return Response(content=orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY), media_type='application/json')
+
 # Small schema definitions for endpoints
 class BacktestRequest(BaseModel):
     csv_path: str
@@ -33,10 +48,8 @@ class WalkForwardRequest(BaseModel):
     insample_days: int = Field(default=252, ge=1)
     outsample_days: int = Field(default=63, ge=1)
 
-# Serve the small frontend (copied from the single-file example)
-@app.get('/', response_class=HTMLResponse)
-async def homepage():
-    html = """<!doctype html>
+# Small frontend (copied from the single-file example), encoded once at import
+HOMEPAGE = """<!doctype html>
 <html>
   <head>
     <meta charset="utf-8" />
@@ -78,7 +91,22 @@ async function runBacktest(){
   const j = await res.json();
   document.getElementById('report').innerText = JSON.stringify(j.report, null, 2);
   document.getElementById('log').innerText = 'Done';
-  drawChart(j.timestamps, j.equity);
+  drawChart(chartLabels(j), decodeB64(j.equity_b64, Float32Array));
+}
+
+// Timestamps come as int32 offsets from t_start, or as a plain list when no unit fits
+function chartLabels(j){
+  if(j.timestamps_b64 === null) return j.timestamps;
+  const unitMs = {D: 86400000, s: 1000, ms: 1}[j.t_unit];
+  const t0 = Date.parse(j.t_start + 'Z');
+  const width = j.t_unit === 'ms' ? 23 : 19;
+  return Array.from(decodeB64(j.timestamps_b64, Int32Array), off => new Date(t0 + off * unitMs).toISOString().slice(0, width));
+}
+
+// Backtest arrays arrive as base64 little-endian typed arrays
+function decodeB64(b64, ArrayType){
+  const bytes = Uint8Array.from(atob(b64), c => c.charCodeAt(0));
+  return new ArrayType(bytes.buffer);
 }
 
 async function runWalkforward(){
@@ -106,43 +134,70 @@ function drawChart(labels, data){
 </script>
   </body>
 </html>"""
-    return HTMLResponse(content=html)
+_INDEX_HTML: bytes = HOMEPAGE.encode('utf-8')
+
+@app.get('/', response_class=HTMLResponse)
+async def homepage():
+    return HTMLResponse(content=_INDEX_HTML, headers={'Cache-Control': 'public, max-age=3600'})
+
+def _warm_csv_cache(path: str):
+    # Full parse of a fresh upload, run after the response so the next
+    # /backtest or /walkforward on it hits load_csv_from_path's cache.
+    # Problems past the validated head are reported by that request instead.
+    try:
+        load_csv_from_path(path)
+    except Exception:
+        logger.exception('Warming the CSV cache failed for %s', path)
 
 # Upload endpoint
 @app.post('/upload')
-async def upload_csv(file: UploadFile = File(...)):
+async def upload_csv(background_tasks: BackgroundTasks, file: UploadFile = File(...)):
     if not file.filename.lower().endswith('.csv'):
         raise HTTPException(status_code=400, detail='Please upload a CSV file')
-    content = await file.read()
-    try:
-        df = load_csv_from_bytes(content)
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=str(e))
     uploaded_path = os.path.join(DATA_DIR, 'uploaded.csv')
     os.makedirs(os.path.dirname(uploaded_path), exist_ok=True)
-    with open(uploaded_path, 'wb') as f:
-        f.write(content)
+    # Stream into a per-request temp file so a rejected upload never replaces the
+    # previous one and concurrent uploads never share a half-written file
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(uploaded_path), suffix='.part')
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            while chunk := await file.read(UPLOAD_BLOCKSIZE):
+                await asyncio.to_thread(out.write, chunk)
+        try:
+            df = await asyncio.to_thread(read_csv_head, tmp_path, UPLOAD_VALIDATE_ROWS)
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        os.replace(tmp_path, uploaded_path)
+    finally:
+        # failed, rejected or aborted streams leave nothing behind
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    background_tasks.add_task(_warm_csv_cache, uploaded_path)
     return {'columns': df.columns.tolist(), 'rows': min(5, len(df)), 'head': df.head(min(5, len(df))).to_dict(orient='records'), 'saved_to': uploaded_path}
 
 # Backtest endpoint
 @app.post('/backtest')
-async def api_backtest(req: BacktestRequest):
+async def api_backtest(req: BacktestRequest, arrays: Literal['b64', 'list'] = 'b64'):
+    # equity/timestamps always come back base64-packed; ?arrays=list adds the plain JSON lists
     try:
-        df = load_csv_from_path(req.csv_path)
+        df = await asyncio.to_thread(load_csv_from_path, req.csv_path)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
-    result = run_backtest(df, req.strategy_name, req.params or {})
-    return JSONResponse(result)
+    result = await asyncio.to_thread(run_backtest, df, req.strategy_name, req.params or {}, arrays == 'list')
+    return _json_response(result)
 
 # Walk-forward endpoint
 @app.post('/walkforward')
 async def api_walkforward(req: WalkForwardRequest):
     try:
-        df = load_csv_from_path(req.csv_path)
+        df = await asyncio.to_thread(load_csv_from_path, req.csv_path)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
-    result = run_walkforward(df, req.strategy_name, req.param_space, req.insample_days, req.outsample_days)
-    return JSONResponse(result)
+    try:
+        result = await asyncio.to_thread(run_walkforward, df, req.strategy_name, req.param_space, req.insample_days, req.outsample_days)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return _json_response(result)
 
 # Optionally run with `python -m uvicorn app.main:app --reload`
 if __name__ == '__main__':
@@ -1,16 +1,22 @@
 """Utility functions: CSV loaders, backtest and walk-forward logic, metrics."""
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Tuple
 import pandas as pd
 import numpy as np
 import os
-import io
-from .strategies import create_strategy
+import base64
+import threading
+from collections import OrderedDict
+from numba import njit
+from .strategies import create_strategy, get_strategy_class, SmaCross, _sma, _TIE_RTOL
 from pydantic import BaseModel
 
 # Path to data directory (project root / data)
 BASE_DIR = os.path.dirname(os.path.dirname(__file__))
 DATA_DIR = os.path.abspath(os.path.join(BASE_DIR, '..', 'data'))
 
+# Columns with a known dtype; everything else is inferred by the Arrow reader
+_CSV_DTYPES = {'close': 'float64'}
+
 class BacktestReport(BaseModel):
     total_return: float
     sharpe: float
@@ -19,7 +25,7 @@ class BacktestReport(BaseModel):
     trades: int
 
 # --- CSV loaders ---
-def load_csv_from_path(path: str) -> pd.DataFrame:
+def _resolve_csv_path(path: str) -> str:
     # Try relative to cwd, then to DATA_DIR, then absolute
     if not os.path.isabs(path):
         candidate = os.path.join(os.getcwd(), path)
@@ -29,112 +35,359 @@ def load_csv_from_path(path: str) -> pd.DataFrame:
             candidate2 = os.path.join(DATA_DIR, path)
             if os.path.exists(candidate2):
                 path = candidate2
-    df = pd.read_csv(path)
-    if 'timestamp' not in df.columns or 'close' not in df.columns:
-        raise ValueError("CSV must contain 'timestamp' and 'close' columns")
-    df['timestamp'] = pd.to_datetime(df['timestamp'])
-    df = df.sort_values('timestamp').reset_index(drop=True)
-    return df
+    return os.path.abspath(path)
 
-def load_csv_from_bytes(content: bytes) -> pd.DataFrame:
-    df = pd.read_csv(io.BytesIO(content))
+def _prepare_prices(df: pd.DataFrame) -> pd.DataFrame:
     if 'timestamp' not in df.columns or 'close' not in df.columns:
         raise ValueError("CSV must contain 'timestamp' and 'close' columns")
-    df['timestamp'] = pd.to_datetime(df['timestamp'])
+    df['timestamp'] = pd.to_datetime(df['timestamp'], cache=True)
     df = df.sort_values('timestamp').reset_index(drop=True)
     return df
 
+# Parsed frames keyed by absolute path, most recently used last.  One entry per
+# file: a changed (mtime, size) replaces it, so re-uploads never pin old frames.
+_CSV_CACHE: 'OrderedDict[str, Tuple[Tuple[int, int], pd.DataFrame]]' = OrderedDict()
+_CSV_CACHE_LOCK = threading.Lock()
+_CSV_CACHE_MAX = 32
+
+def _read_prices(abspath: str) -> pd.DataFrame:
+    return _prepare_prices(pd.read_csv(abspath, engine='pyarrow', dtype=_CSV_DTYPES))
+
+def load_csv_from_path(path: str) -> pd.DataFrame:
+    """Load and sort a price CSV, reusing the parsed frame while the file is unchanged.
+
+    The returned frame is a shallow copy of the cached one: adding or replacing
+    columns is fine, but callers must not modify its values in place.
+    """
+    abspath = _resolve_csv_path(path)
+    st = os.stat(abspath)
+    stamp = (st.st_mtime_ns, st.st_size)
+    with _CSV_CACHE_LOCK:
+        entry = _CSV_CACHE.get(abspath)
+        if entry is not None and entry[0] == stamp:
+            _CSV_CACHE.move_to_end(abspath)
+            return entry[1].copy(deep=False)
+        # stale: release the old frame before parsing the new one
+        _CSV_CACHE.pop(abspath, None)
+    df = _read_prices(abspath)
+    with _CSV_CACHE_LOCK:
+        _CSV_CACHE[abspath] = (stamp, df)
+        _CSV_CACHE.move_to_end(abspath)
+        while len(_CSV_CACHE) > _CSV_CACHE_MAX:
+            _CSV_CACHE.popitem(last=False)
+    return df.copy(deep=False)
+
+def read_csv_head(path: str, rows: int) -> pd.DataFrame:
+    """Parse and validate only the first `rows` rows of a CSV on disk."""
+    with pd.read_csv(path, chunksize=rows, engine='c', dtype=_CSV_DTYPES) as reader:
+        first = next(reader, None)
+    # a header-only file still yields one empty chunk
+    if first is None or first.empty:
+        raise ValueError('CSV has no data rows')
+    return _prepare_prices(first)
+
 # --- Metrics and backtest ---
-def compute_metrics(equity_curve: pd.Series, trade_returns: pd.Series) -> BacktestReport:
-    # equity_curve: index=0..N, values = equity series (e.g., cumulative product)
+@njit(cache=True, nogil=True, error_model='numpy')
+def _metrics(eq, tr):
+    """Single sweep over the equity curve (Welford stats, running max) plus one over trade returns.
+
+    No fastmath: equity can reach 0 or carry NaN/inf from bad prices, and the
+    numpy error model turns x/0 into inf/NaN instead of raising.
+    """
+    n = eq.shape[0]
+    if n == 0:
+        return 0.0, 0.0, 0.0, 0.0, 0
+    base = eq[0]
+    mean = 0.0
+    m2 = 0.0
+    roll_max = 1.0
+    max_dd = 0.0
+    for t in range(n):
+        r = 0.0
+        if t > 0:
+            r = eq[t] / eq[t - 1] - 1.0
+            if np.isnan(r):
+                r = 0.0  # e.g. 0/0 once equity is wiped out; pct_change().fillna(0) did the same
+        delta = r - mean
+        mean += delta / (t + 1)
+        m2 += delta * (r - mean)
+        cum = eq[t] / base
+        if cum > roll_max:
+            roll_max = cum
+        dd = cum / roll_max - 1.0
+        if dd < max_dd:
+            max_dd = dd
+    sharpe = 0.0
+    if n > 1:
+        var = m2 / (n - 1)
+        if var > 0:
+            sharpe = mean / np.sqrt(var) * np.sqrt(252.0)
+    wins = 0
+    for x in tr:
+        if x > 0:
+            wins += 1
+    trades = tr.shape[0]
+    win_rate = wins / trades if trades > 0 else 0.0
+    return eq[n - 1] / base - 1.0, sharpe, max_dd, win_rate, trades
+
+def compute_metrics(equity_curve: np.ndarray, trade_returns: np.ndarray) -> BacktestReport:
+    # equity_curve: equity series (e.g., cumulative product), array or Series
     # trade_returns: per-trade returns (or per-change returns) used for win-rate/trades
-    ret = equity_curve.pct_change().fillna(0)
-    vol = ret.std()
-    if vol == 0 or np.isnan(vol):
-        sharpe = 0.0
-    else:
-        sharpe = (ret.mean() / vol) * np.sqrt(252)
-    cum = equity_curve / equity_curve.iloc[0]
-    roll_max = cum.cummax()
-    dd = (cum / roll_max - 1).min()
-    wins = (trade_returns > 0).sum()
-    trades = int(len(trade_returns))
-    win_rate = float(wins) / trades if trades > 0 else 0.0
-    total_return = float(cum.iloc[-1] - 1)
-    return BacktestReport(total_return=total_return, sharpe=float(sharpe), max_drawdown=float(dd), win_rate=win_rate, trades=trades)
-
-def run_backtest(df: pd.DataFrame, strategy_name: str, params: Dict[str, Any]):
-    # Create strategy from registry and generate signals
+    total_return, sharpe, dd, win_rate, trades = _metrics(np.asarray(equity_curve, dtype=np.float64), np.asarray(trade_returns, dtype=np.float64))
+    return BacktestReport(total_return=float(total_return), sharpe=float(sharpe), max_drawdown=float(dd), win_rate=float(win_rate), trades=int(trades))
+
+@njit(cache=True, nogil=True, error_model='numpy')
+def _sma_grid_sharpe(table, ret, fast_idx, slow_idx, tie_rtol):
+    """Annualized Sharpe of every SMA crossover combo over one window.
+
+    `table` stacks precomputed SMAs (one row per distinct window) and combo k
+    crosses rows fast_idx[k] and slow_idx[k]. `ret` holds the bar returns (its
+    first entry is ignored). Mirrors SmaCross's tie-tolerant sign(fast - slow) -> next-bar position ->
+    compute_metrics without building any intermediate arrays. No fastmath, for
+    the same reason as _metrics.
+    """
+    n = ret.shape[0]
+    out = np.zeros(fast_idx.shape[0])
+    if n < 2:
+        return out
+    for k in range(fast_idx.shape[0]):
+        sma_fast = table[fast_idx[k]]
+        sma_slow = table[slow_idx[k]]
+        prev_signal = 0.0
+        eq = 1.0
+        mean = 0.0
+        m2 = 0.0
+        for t in range(n):
+            # position held over bar t is the signal from bar t-1 (flat on the first bar)
+            r = prev_signal * ret[t]
+            # the return _metrics recovers from cumprod(1 + r): 0 once equity is wiped out
+            nxt = eq * (1.0 + r)
+            r = nxt / eq - 1.0
+            if np.isnan(r):
+                r = 0.0
+            eq = nxt
+            delta = r - mean
+            mean += delta / (t + 1)
+            m2 += delta * (r - mean)
+            diff = sma_fast[t] - sma_slow[t]
+            if abs(diff) <= tie_rtol * abs(sma_slow[t]):
+                diff = 0.0
+            prev_signal = 1.0 if diff > 0 else (-1.0 if diff < 0 else 0.0)
+        var = m2 / (n - 1)
+        if var > 0:
+            out[k] = mean / np.sqrt(var) * np.sqrt(252.0)
+    return out
+
+def _bar_returns(close: np.ndarray) -> np.ndarray:
+    # close-to-close returns, 0 on the first bar and wherever a price is missing
+    # or the previous one is 0 (inf would poison every downstream sum)
+    ret = np.empty_like(close)
+    ret[:1] = 0.0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ret[1:] = close[1:] / close[:-1] - 1
+    ret[~np.isfinite(ret)] = 0.0
+    return ret
+
+def _strategy_returns(ret: np.ndarray, signal: np.ndarray) -> np.ndarray:
+    # position is previous bar's signal (simple next-bar execution assumption),
+    # so ret[0] never contributes and slices of a longer return series are fine.
+    # Signals/positions stay int8; only the product with ret is float64.
+    signal = np.asarray(signal, dtype=np.int8)
+    position = np.empty(len(signal), dtype=np.int8)
+    position[:1] = 0
+    position[1:] = signal[:-1]
+    return position * ret
+
+def _timestamp_array(ts: pd.Series) -> np.ndarray:
+    # Kept as datetime64 so the JSON encoder can emit ISO strings in bulk
+    return ts.to_numpy(dtype='datetime64[us]')
+
+# Chart offset units, coarsest first, with their length in microseconds
+_CHART_UNITS = (('D', 86_400_000_000), ('s', 1_000_000), ('ms', 1_000))
+
+def _encode_chart_arrays(equity: np.ndarray, timestamps: np.ndarray) -> Dict[str, Any]:
+    """Pack equity/timestamps as base64 little-endian typed arrays for the chart.
+
+    Equity becomes float32; timestamps become int32 offsets from `t_start` in
+    the coarsest of days, seconds or milliseconds that represents every bar
+    exactly. If none does (sub-millisecond bars, or too long a span for int32),
+    timestamps_b64 is None and callers must send the timestamps as a list.
+    """
+    equity_b64 = base64.b64encode(equity.astype('<f4').tobytes()).decode('ascii')
+    if len(timestamps) == 0:
+        return {'n': 0, 't_start': None, 't_unit': 'D', 'timestamps_b64': '', 'equity_b64': equity_b64}
+    start = timestamps[0].astype('datetime64[us]')
+    start_us = start.astype(np.int64)
+    offsets = (timestamps - start).astype('timedelta64[us]').astype(np.int64)
+    # JS dates keep milliseconds, so the start must not be finer than that
+    if not start_us % 1_000:
+        t_start = str(start.astype('datetime64[ms]' if start_us % 1_000_000 else 'datetime64[s]'))
+        for t_unit, unit_us in _CHART_UNITS:
+            scaled = offsets // unit_us
+            if (offsets % unit_us).any() or np.abs(scaled).max() > np.iinfo(np.int32).max:
+                continue
+            return {
+                'n': len(timestamps),
+                't_start': t_start,
+                't_unit': t_unit,
+                'timestamps_b64': base64.b64encode(scaled.astype('<i4').tobytes()).decode('ascii'),
+                'equity_b64': equity_b64,
+            }
+    return {'n': len(timestamps), 't_start': None, 't_unit': None, 'timestamps_b64': None, 'equity_b64': equity_b64}
+
+def run_backtest(df: pd.DataFrame, strategy_name: str, params: Dict[str, Any], as_lists: bool = False):
+    # Create strategy from registry and generate signals (aligned to df rows)
     strat = create_strategy(strategy_name, params or {})
-    sig = strat.generate_signals(df)
-    d = df.merge(sig, on='timestamp', how='left')
-    d['signal'] = d['signal'].fillna(0).astype(int)
-    # position is previous day's signal (simple next-bar execution assumption)
-    d['position'] = d['signal'].shift(1).fillna(0)
-    d['ret'] = d['close'].pct_change().fillna(0)
-    d['strategy_ret'] = d['position'] * d['ret']
-    equity = (1 + d['strategy_ret']).cumprod()
-    d['pos_change'] = d['position'].diff().abs().fillna(0)
-    trade_mask = d['pos_change'] > 0
-    trade_returns = d.loc[trade_mask, 'strategy_ret']
-    report = compute_metrics(equity, trade_returns)
-    return {'report': report.model_dump(), 'equity': equity.tolist(), 'timestamps': d['timestamp'].dt.isoformat().tolist()}
+    signal = np.asarray(strat.generate_signals(df), dtype=np.int8)
+    strategy_ret = _strategy_returns(_bar_returns(df['close'].to_numpy(dtype=np.float64)), signal)
+    equity = np.cumprod(1 + strategy_ret)
+    # a trade is any bar where the held position differs from the previous bar's
+    # (position starts flat, so bar 1 trades whenever signal[0] is nonzero)
+    trade_mask = np.zeros(len(signal), dtype=bool)
+    trade_mask[1:2] = signal[:1] != 0
+    trade_mask[2:] = signal[1:-1] != signal[:-2]
+    report = compute_metrics(equity, strategy_ret[trade_mask])
+    timestamps = _timestamp_array(df['timestamp'])
+    result = {'report': report.model_dump(), **_encode_chart_arrays(equity, timestamps)}
+    if as_lists:
+        # full-precision arrays, rendered as plain JSON lists
+        result['equity'] = equity
+        result['timestamps'] = timestamps
+    elif result['timestamps_b64'] is None:
+        result['timestamps'] = timestamps
+    return result
 
 # --- Walk-forward grid search ---
-from itertools import product
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import json
+
+# In-sample Sharpe per (csv_id, is_start, is_end, strategy_name, params_hash),
+# shared across calls so re-running an overlapping grid skips known combos
+_IS_SHARPE: Dict[tuple, float] = {}
+_IS_SHARPE_LOCK = threading.Lock()
+_IS_SHARPE_MAX = 100_000
 
-def _grid(param_space: Dict[str, Any]):
+def clear_walkforward_cache():
+    with _IS_SHARPE_LOCK:
+        _IS_SHARPE.clear()
+
+def _memo_lookup(keys: List[tuple]) -> List[Any]:
+    # cached Sharpe per key, or None on a miss
+    with _IS_SHARPE_LOCK:
+        return [_IS_SHARPE.get(k) for k in keys]
+
+def _memo_store(keys: List[tuple], sharpes: List[float]):
+    with _IS_SHARPE_LOCK:
+        if len(_IS_SHARPE) + len(keys) > _IS_SHARPE_MAX:
+            _IS_SHARPE.clear()
+        _IS_SHARPE.update(zip(keys, sharpes))
+
+def _grid(param_space: Dict[str, Any], strategy_cls) -> Tuple[List[str], np.ndarray]:
+    """Valid combos as an (N, K) array of indices into each key's value list.
+
+    Indices rather than the values themselves so mixed-type lists survive intact.
+    """
     keys = sorted(param_space.keys())
-    values = [param_space[k] for k in keys]
-    for vals in product(*values):
-        yield dict(zip(keys, vals))
+    axes = [np.arange(len(param_space[k])) for k in keys]
+    if keys:
+        grid = np.stack(np.meshgrid(*axes, indexing='ij'), axis=-1).reshape(-1, len(keys))
+    else:
+        grid = np.zeros((1, 0), dtype=np.intp)  # one empty combo: all strategy defaults
+    valid = [strategy_cls.is_valid_params(_combo_params(param_space, keys, row)) for row in grid]
+    return keys, grid[np.array(valid, dtype=bool)]
 
-def run_walkforward(df: pd.DataFrame, strategy_name: str, param_space: Dict[str, Any], insample_days: int, outsample_days: int):
-    df = df.sort_values('timestamp').reset_index(drop=True)
-    results = []
-    oos_returns = []
-    oos_timestamps = []
+def _combo_params(param_space: Dict[str, Any], keys: List[str], row: np.ndarray) -> Dict[str, Any]:
+    return {k: param_space[k][i] for k, i in zip(keys, row)}
+
+def _walkforward_folds(n: int, insample_days: int, outsample_days: int) -> List[tuple]:
+    # (is_start, is_end, oos_end) row offsets for each rolling fold
+    folds = []
     i = 0
-    n = len(df)
-    while True:
-        is_start = i
-        is_end = i + insample_days
-        oos_end = is_end + outsample_days
-        if oos_end > n:
-            break
-        is_df = df.iloc[is_start:is_end].reset_index(drop=True)
-        oos_df = df.iloc[is_end:oos_end].reset_index(drop=True)
-        best_sharpe = -1e9
-        best_params = None
-        for params in _grid(param_space):
-            strat = create_strategy(strategy_name, params)
-            sig = strat.generate_signals(is_df)
-            d = is_df.merge(sig, on='timestamp', how='left')
-            d['signal'] = d['signal'].fillna(0).astype(int)
-            d['position'] = d['signal'].shift(1).fillna(0)
-            d['ret'] = d['close'].pct_change().fillna(0)
-            d['strategy_ret'] = d['position'] * d['ret']
-            equity = (1 + d['strategy_ret']).cumprod()
-            m = compute_metrics(equity, d['strategy_ret'])
-            if m.sharpe > best_sharpe:
-                best_sharpe = m.sharpe
-                best_params = params
-        # apply best params on OOS segment
-        strat = create_strategy(strategy_name, best_params or {})
-        sig = strat.generate_signals(oos_df)
-        d2 = oos_df.merge(sig, on='timestamp', how='left')
-        d2['signal'] = d2['signal'].fillna(0).astype(int)
-        d2['position'] = d2['signal'].shift(1).fillna(0)
-        d2['ret'] = d2['close'].pct_change().fillna(0)
-        d2['strategy_ret'] = d2['position'] * d2['ret']
-        oos_returns.extend(d2['strategy_ret'].tolist())
-        oos_timestamps.extend(d2['timestamp'].dt.isoformat().tolist())
-        results.append({'is_range': [str(is_df['timestamp'].iloc[0]), str(is_df['timestamp'].iloc[-1])], 'oos_range': [str(oos_df['timestamp'].iloc[0]), str(oos_df['timestamp'].iloc[-1])], 'best_params': best_params, 'best_is_sharpe': best_sharpe})
+    while i + insample_days + outsample_days <= n:
+        folds.append((i, i + insample_days, i + insample_days + outsample_days))
         i += outsample_days
-    if len(oos_returns) == 0:
-        return {'segments': results, 'oos': None, 'overfit_risk': None}
-    oos_eq = (1 + pd.Series(oos_returns).fillna(0)).cumprod()
-    oos_report = compute_metrics(oos_eq, pd.Series(oos_returns).fillna(0))
+    return folds
+
+def _sma_cross_sharpes(windows: np.ndarray, is_close: np.ndarray, is_ret: np.ndarray) -> List[float]:
+    # windows holds one (fast, slow) row per combo. Each distinct window is
+    # smoothed once; combos then index rows of the stacked table.
+    distinct, inverse = np.unique(windows.ravel(), return_inverse=True)
+    table = np.stack([_sma(is_close, int(w)) for w in distinct])
+    idx = inverse.reshape(windows.shape)
+    return _sma_grid_sharpe(table, is_ret, idx[:, 0], idx[:, 1], _TIE_RTOL).tolist()
+
+def _evaluate_combos(strategy_name: str, combos: List[Dict[str, Any]], windows, todo: List[int], is_df: pd.DataFrame, is_close: np.ndarray, is_ret: np.ndarray) -> List[float]:
+    if windows is not None:
+        return _sma_cross_sharpes(windows[todo], is_close, is_ret)
+    sharpes = []
+    for k in todo:
+        strat = create_strategy(strategy_name, combos[k])
+        strategy_ret = _strategy_returns(is_ret, strat.generate_signals(is_df))
+        sharpes.append(compute_metrics(np.cumprod(1 + strategy_ret), strategy_ret).sharpe)
+    return sharpes
+
+def _process_fold(df: pd.DataFrame, close: np.ndarray, ret: np.ndarray, csv_id: str, strategy_name: str, combos: List[Dict[str, Any]], combo_hashes: List[str], windows, fold: tuple):
+    """Grid-search one in-sample window, then apply the winner out-of-sample.
+
+    `close` and `ret` cover the whole series and are sliced by the fold offsets.
+    `windows` is the (N, 2) fast/slow array for sma_cross, else None.
+    """
+    is_start, is_end, oos_end = fold
+    is_df = df.iloc[is_start:is_end].reset_index(drop=True)
+    oos_df = df.iloc[is_end:oos_end].reset_index(drop=True)
+    is_close = close[is_start:is_end]
+    is_ret = ret[is_start:is_end]
+    keys = [(csv_id, is_start, is_end, strategy_name, h) for h in combo_hashes]
+    sharpes = _memo_lookup(keys)
+    missing = [k for k, sharpe in enumerate(sharpes) if sharpe is None]
+    if missing:
+        computed = _evaluate_combos(strategy_name, combos, windows, missing, is_df, is_close, is_ret)
+        for k, sharpe in zip(missing, computed):
+            sharpes[k] = sharpe
+        _memo_store([keys[k] for k in missing], computed)
+    best_sharpe = -1e9
+    best_params = None
+    for params, sharpe in zip(combos, sharpes):
+        if sharpe > best_sharpe:
+            best_sharpe = sharpe
+            best_params = params
+    # apply best params on OOS segment
+    strat = create_strategy(strategy_name, best_params or {})
+    oos_ret = _strategy_returns(ret[is_end:oos_end], strat.generate_signals(oos_df))
+    segment = {'is_range': [str(is_df['timestamp'].iloc[0]), str(is_df['timestamp'].iloc[-1])], 'oos_range': [str(oos_df['timestamp'].iloc[0]), str(oos_df['timestamp'].iloc[-1])], 'best_params': best_params, 'best_is_sharpe': best_sharpe}
+    return segment, oos_ret, _timestamp_array(oos_df['timestamp'])
+
+def run_walkforward(df: pd.DataFrame, strategy_name: str, param_space: Dict[str, Any], insample_days: int, outsample_days: int):
+    strategy_cls = get_strategy_class(strategy_name)
+    keys, grid = _grid(param_space, strategy_cls)
+    if len(grid) == 0:
+        raise ValueError(f'param_space has no valid combinations for strategy {strategy_name}')
+    df = df.sort_values('timestamp').reset_index(drop=True)
+    folds = _walkforward_folds(len(df), insample_days, outsample_days)
+    if not folds:
+        return {'segments': [], 'oos': None, 'overfit_risk': None}
+    combos = [_combo_params(param_space, keys, row) for row in grid]
+    combo_hashes = [json.dumps(params, sort_keys=True) for params in combos]
+    windows = None
+    if strategy_cls is SmaCross:
+        # validate and resolve every combo to integer windows once; folds never touch the dicts
+        strats = [create_strategy(strategy_name, params) for params in combos]
+        windows = np.array([(s.fast, s.slow) for s in strats], dtype=np.int64).reshape(-1, 2)
+    # Invariant across folds and combos: derive once, slice per fold
+    close = df['close'].to_numpy(dtype=np.float64)
+    ret = _bar_returns(close)
+    # Content hash rather than id(df) so reloaded copies of the same prices share memo entries
+    csv_id = hashlib.blake2b(close.tobytes(), digest_size=16).hexdigest()
+    # Folds are independent; the SMA kernel releases the GIL so threads scale
+    workers = min(len(folds), os.cpu_count() or 1)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        fold_results = list(executor.map(partial(_process_fold, df, close, ret, csv_id, strategy_name, combos, combo_hashes, windows), folds))
+    results = [seg for seg, _, _ in fold_results]
+    oos_returns = np.concatenate([r for _, r, _ in fold_results])
+    oos_timestamps = np.concatenate([ts for _, _, ts in fold_results])
+    oos_report = compute_metrics(np.cumprod(1 + oos_returns), oos_returns)
     is_sharpes = [seg['best_is_sharpe'] for seg in results]
     median_is = float(np.median(is_sharpes)) if is_sharpes else 0.0
     oos_sharpe = oos_report.sharpe
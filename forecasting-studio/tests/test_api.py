@@ -1,6 +1,12 @@
+import asyncio
 import os
+import base64
+import httpx
+import numpy as np
 from fastapi.testclient import TestClient
 from app.main import app
+from app import utils
+from app.utils import load_csv_from_path
 
 client = TestClient(app)
 
@@ -11,8 +17,86 @@ def test_homepage():
 
 def test_backtest_sample():
     payload = {"csv_path": "data/sample_prices.csv", "strategy_name": "sma_cross", "params": {"fast": 2, "slow": 3}}
-    r = client.post('/backtest', json=payload)
+    r = client.post('/backtest?arrays=list', json=payload)
     assert r.status_code == 200
     j = r.json()
     assert 'report' in j
     assert 'equity' in j
+
+def test_backtest_b64_arrays_match_lists():
+    payload = {"csv_path": "data/sample_prices.csv", "strategy_name": "sma_cross", "params": {"fast": 2, "slow": 3}}
+    j = client.post('/backtest?arrays=list', json=payload).json()
+    assert j['n'] == len(j['equity'])
+    equity = np.frombuffer(base64.b64decode(j['equity_b64']), dtype='<f4')
+    assert np.allclose(equity, j['equity'])
+    offsets = np.frombuffer(base64.b64decode(j['timestamps_b64']), dtype='<i4')
+    assert j['t_unit'] == 'D'
+    days = np.datetime64(j['t_start'], 'D') + offsets.astype('timedelta64[D]')
+    assert [str(d) for d in days] == [t[:10] for t in j['timestamps']]
+    assert 'equity' not in client.post('/backtest', json=payload).json()
+
+def test_walkforward_sample():
+    payload = {"csv_path": "data/sample_prices.csv", "strategy_name": "sma_cross", "param_space": {"fast": [1, 2], "slow": [2, 3]}, "insample_days": 3, "outsample_days": 1}
+    r = client.post('/walkforward', json=payload)
+    assert r.status_code == 200
+    j = r.json()
+    assert len(j['segments']) == 2
+    assert len(j['oos']['timestamps']) == 2
+
+def test_walkforward_rejects_empty_grid():
+    payload = {"csv_path": "data/sample_prices.csv", "strategy_name": "sma_cross", "param_space": {"fast": [20, 30], "slow": [5, 10]}, "insample_days": 3, "outsample_days": 1}
+    r = client.post('/walkforward', json=payload)
+    assert r.status_code == 400
+    assert 'no valid combinations' in r.json()['detail']
+
+def test_upload_csv(tmp_path, monkeypatch):
+    monkeypatch.setattr('app.main.DATA_DIR', str(tmp_path))
+    with open('data/sample_prices.csv', 'rb') as f:
+        r = client.post('/upload', files={'file': ('prices.csv', f, 'text/csv')})
+    assert r.status_code == 200
+    assert r.json()['rows'] == 5
+    assert os.path.exists(tmp_path / 'uploaded.csv')
+
+def test_upload_warms_csv_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr('app.main.DATA_DIR', str(tmp_path))
+    with open('data/sample_prices.csv', 'rb') as f:
+        saved_to = client.post('/upload', files={'file': ('prices.csv', f, 'text/csv')}).json()['saved_to']
+    def reparse(abspath):
+        raise AssertionError('upload was not cached')
+    monkeypatch.setattr(utils, '_read_prices', reparse)
+    load_csv_from_path(saved_to)
+
+def test_reupload_replaces_cached_frame(tmp_path, monkeypatch):
+    monkeypatch.setattr('app.main.DATA_DIR', str(tmp_path))
+    first = b'timestamp,close\n2023-01-02,100\n2023-01-03,101\n'
+    second = first + b'2023-01-04,102\n'
+    for body in (first, second):
+        saved_to = client.post('/upload', files={'file': ('prices.csv', body, 'text/csv')}).json()['saved_to']
+    assert list(utils._CSV_CACHE).count(saved_to) == 1
+    assert len(utils._CSV_CACHE[saved_to][1]) == 3
+
+def test_concurrent_uploads_use_separate_temp_files(tmp_path, monkeypatch):
+    monkeypatch.setattr('app.main.DATA_DIR', str(tmp_path))
+    monkeypatch.setattr('app.main.UPLOAD_BLOCKSIZE', 64)  # many awaits per upload
+    with open('data/sample_prices.csv', 'rb') as f:
+        body = f.read()
+    async def upload_many():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url='http://test') as ac:
+            return await asyncio.gather(*[ac.post('/upload', files={'file': ('prices.csv', body, 'text/csv')}) for _ in range(8)])
+    responses = asyncio.run(upload_many())
+    assert [r.status_code for r in responses] == [200] * 8
+    assert os.listdir(tmp_path) == ['uploaded.csv']
+
+def test_upload_rejects_missing_columns(tmp_path, monkeypatch):
+    monkeypatch.setattr('app.main.DATA_DIR', str(tmp_path))
+    r = client.post('/upload', files={'file': ('prices.csv', b'date,price\n2023-01-02,100\n', 'text/csv')})
+    assert r.status_code == 400
+    assert os.listdir(tmp_path) == []
+
+def test_upload_rejects_header_only_csv(tmp_path, monkeypatch):
+    monkeypatch.setattr('app.main.DATA_DIR', str(tmp_path))
+    r = client.post('/upload', files={'file': ('prices.csv', b'timestamp,close\n', 'text/csv')})
+    assert r.status_code == 400
+    assert r.json()['detail'] == 'CSV has no data rows'
+    assert os.listdir(tmp_path) == []
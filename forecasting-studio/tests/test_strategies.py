@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+from app.strategies import SmaCross, _sma
+
+def test_sma_matches_pandas_rolling():
+    x = np.random.default_rng(0).random(100) * 100
+    for w in [1, 2, 10, 100, 150]:
+        expected = pd.Series(x).rolling(window=w, min_periods=1).mean().to_numpy()
+        assert np.allclose(_sma(x, w), expected)
+
+def test_sma_keeps_precision_on_long_series():
+    x = 100 * np.exp(np.cumsum(np.random.default_rng(0).normal(0, 0.01, 200_000)))
+    expected = pd.Series(x).rolling(window=50, min_periods=1).mean().to_numpy()
+    assert np.allclose(_sma(x, 50), expected, rtol=1e-12, atol=0)
+
+def test_sma_cross_signals_are_int8_and_aligned():
+    df = pd.DataFrame({'timestamp': pd.date_range('2023-01-02', periods=50), 'close': np.linspace(100, 150, 50)})
+    signal = SmaCross(fast=2, slow=5).generate_signals(df)
+    assert signal.dtype == np.int8
+    assert len(signal) == len(df)
+    assert set(np.unique(signal)) <= {-1, 0, 1}
+
+def test_sma_cross_does_not_mutate_input():
+    df = pd.DataFrame({'timestamp': pd.date_range('2023-01-02', periods=50), 'close': np.linspace(100, 150, 50)})
+    before = df.copy()
+    SmaCross(fast=2, slow=5).generate_signals(df)
+    pd.testing.assert_frame_equal(df, before)
+
+def test_sma_cross_is_flat_on_tied_prices():
+    flat = pd.DataFrame({'timestamp': pd.date_range('2023-01-02', periods=500), 'close': np.full(500, 100.1)})
+    assert not SmaCross(fast=3, slow=17).generate_signals(flat).any()
+    assert np.array_equal(_sma(flat['close'].to_numpy(), 17), flat['close'].to_numpy())
+
+def test_sma_cross_ties_on_stepwise_prices():
+    # the 2- and 3-bar means are equal wherever both windows sit on one step
+    steps = np.repeat(np.round(100 + np.random.default_rng(0).normal(0, 1, 200).cumsum(), 1), 5)
+    df = pd.DataFrame({'timestamp': pd.date_range('2023-01-02', periods=len(steps)), 'close': steps})
+    cents = np.round(steps * 10).astype(np.int64)
+    sum2 = cents + np.r_[0, cents[:-1]]
+    sum3 = sum2 + np.r_[0, 0, cents[:-2]]
+    n = np.minimum(np.arange(len(steps)) + 1, 3)
+    expected = np.sign(sum2 * n - sum3 * np.minimum(n, 2))
+    assert np.array_equal(SmaCross(fast=2, slow=3).generate_signals(df), expected)
+
+def test_sma_long_series_is_exact_on_tied_prices():
+    flat = np.full(200_000, 100.1)
+    assert np.array_equal(_sma(flat, 20), flat)
+    df = pd.DataFrame({'timestamp': pd.date_range('2023-01-02', periods=len(flat), freq='min'), 'close': flat})
+    assert not SmaCross(fast=5, slow=20).generate_signals(df).any()
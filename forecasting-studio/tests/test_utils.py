@@ -0,0 +1,88 @@
+import base64
+import numpy as np
+import pandas as pd
+from app import strategies
+from app.strategies import SmaCross, Strategy
+from app.utils import compute_metrics, load_csv_from_path, run_backtest, run_walkforward, _bar_returns, _sma_cross_sharpes, _strategy_returns
+
+def _prices(n=300, seed=1):
+    close = 100 * np.exp(np.cumsum(np.random.default_rng(seed).normal(0, 0.01, n)))
+    return pd.DataFrame({'timestamp': pd.date_range('2020-01-01', periods=n), 'close': close})
+
+def test_sma_grid_sharpe_matches_pandas_path():
+    df = _prices()
+    close = df['close'].to_numpy()
+    ret = df['close'].pct_change().fillna(0)
+    windows = np.array([[2, 3], [5, 20], [20, 5]])
+    for (fast, slow), sharpe in zip(windows, _sma_cross_sharpes(windows, close, ret.to_numpy())):
+        sig = pd.Series(SmaCross(int(fast), int(slow)).generate_signals(df))
+        strategy_ret = sig.shift(1).fillna(0) * ret
+        expected = compute_metrics((1 + strategy_ret).cumprod(), strategy_ret).sharpe
+        assert np.isclose(sharpe, expected)
+
+def test_sma_grid_sharpe_matches_pandas_path_on_zero_price():
+    df = _prices()
+    df.loc[150, 'close'] = 0.0
+    close = df['close'].to_numpy()
+    ret = _bar_returns(close)
+    windows = np.array([[2, 3], [3, 10], [10, 30]])
+    for (fast, slow), sharpe in zip(windows, _sma_cross_sharpes(windows, close, ret)):
+        strategy_ret = _strategy_returns(ret, SmaCross(int(fast), int(slow)).generate_signals(df))
+        expected = compute_metrics(np.cumprod(1 + strategy_ret), strategy_ret).sharpe
+        assert sharpe != 0.0
+        assert np.isclose(sharpe, expected)
+
+def test_load_csv_from_path_reparses_changed_file(tmp_path):
+    path = tmp_path / 'prices.csv'
+    path.write_text('timestamp,close\n2023-01-02,100\n2023-01-03,101\n')
+    assert len(load_csv_from_path(str(path))) == 2
+    path.write_text('timestamp,close\n2023-01-02,100\n2023-01-03,101\n2023-01-04,102\n')
+    assert len(load_csv_from_path(str(path))) == 3
+
+def test_walkforward_memo_reuses_is_sharpe(monkeypatch):
+    from app import utils
+    utils.clear_walkforward_cache()
+    df = _prices()
+    space = {'fast': [2, 5], 'slow': [10, 20]}
+    first = utils.run_walkforward(df, 'sma_cross', space, 100, 50)
+    assert utils._IS_SHARPE
+    def recompute(*args):
+        raise AssertionError('in-sample Sharpe was recomputed')
+    monkeypatch.setattr(utils, '_evaluate_combos', recompute)
+    second = utils.run_walkforward(df, 'sma_cross', space, 100, 50)
+    assert second['segments'] == first['segments']
+    assert second['oos']['report'] == first['oos']['report']
+
+def test_walkforward_skips_redundant_sma_combos():
+    result = run_walkforward(_prices(), 'sma_cross', {'fast': [2, 5, 20], 'slow': [5, 20]}, 100, 50)
+    assert all(seg['best_params']['fast'] < seg['best_params']['slow'] for seg in result['segments'])
+
+class AlwaysLong(Strategy):
+    def generate_signals(self, df):
+        return np.ones(len(df), dtype=np.int8)
+
+def test_run_backtest_counts_entry_on_first_bar(monkeypatch):
+    monkeypatch.setitem(strategies._REGISTRY, 'always_long', AlwaysLong)
+    report = run_backtest(_prices(), 'always_long', {})['report']
+    assert report['trades'] == 1
+
+def test_compute_metrics_handles_wiped_out_equity():
+    equity = np.array([1.0, 0.5, 0.0, 0.0, 0.0])
+    ret = pd.Series(equity).pct_change().fillna(0)
+    report = compute_metrics(equity, np.array([-0.5, -1.0]))
+    assert report.total_return == -1.0
+    assert report.max_drawdown == -1.0
+    assert np.isclose(report.sharpe, ret.mean() / ret.std() * np.sqrt(252))
+
+def test_run_backtest_encodes_subsecond_bars_exactly():
+    df = _prices(n=50)
+    df['timestamp'] = pd.date_range('2023-01-02 09:30:00.250', periods=50, freq='250ms')
+    result = run_backtest(df, 'sma_cross', {'fast': 2, 'slow': 5})
+    assert result['t_unit'] == 'ms'
+    assert result['t_start'] == '2023-01-02T09:30:00.250'
+    offsets = np.frombuffer(base64.b64decode(result['timestamps_b64']), dtype='<i4')
+    assert np.array_equal(offsets, np.arange(50) * 250)
+    df['timestamp'] = pd.date_range('2023-01-02', periods=50, freq='10us')
+    result = run_backtest(df, 'sma_cross', {'fast': 2, 'slow': 5})
+    assert result['timestamps_b64'] is None
+    assert np.array_equal(result['timestamps'], df['timestamp'].to_numpy(dtype='datetime64[us]'))